@@ -1,6 +1,7 @@
 """Environment for running behave."""
 from __future__ import annotations
 
+from ly_python_tools.config import clear_pyproject_cache
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Iterable
@@ -22,6 +23,12 @@ def version_environment(context: VersionExeContext) -> Iterable[VersionExeEnviro
         yield environment
 
 
-def before_scenario(context: VersionExeContext, _scenario: Scenario):
-    """Enable the scenario fixture."""
+def before_all(context: VersionExeContext):
+    """Create one version environment that is shared by every scenario."""
     use_fixture(version_environment, context)
+
+
+def before_scenario(context: VersionExeContext, _scenario: Scenario):
+    """Start each scenario with an empty version environment."""
+    clear_pyproject_cache()
+    context.environment.reset()
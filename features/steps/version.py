@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import os
-from contextlib import contextmanager
+import shutil
 from dataclasses import dataclass
 from dataclasses import field
 from ly_python_tools.version import main
@@ -16,15 +16,21 @@ from click.testing import CliRunner
 from click.testing import Result
 
 
-@contextmanager
-def set_directory(path: Path):
+class _SetDirectory:
     """Set the cwd within the context."""
-    origin = Path().absolute()
-    try:
-        os.chdir(path)
-        yield
-    finally:
-        os.chdir(origin)
+
+    __slots__ = ("path", "origin")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.origin = ""
+
+    def __enter__(self):
+        self.origin = os.getcwd()
+        os.chdir(self.path)
+
+    def __exit__(self, *_: object):
+        os.chdir(self.origin)
 
 
 @dataclass
@@ -36,19 +42,72 @@ class VersionExeEnvironment:
     project_files: dict[str, str] = field(default_factory=dict)
     environ: dict[str, str] = field(default_factory=dict)
     _runner: CliRunner = field(default_factory=CliRunner)
+    # Copy of environ the last time it was applied to _runner
+    _runner_environ: dict[str, str] | None = None
 
     def run(self, *args: str) -> Result:
         """Run the version executable in this environment."""
         if not self._path.exists():
             self._path.mkdir(parents=True)
+        base = os.fspath(self._path)
         for rel_path, contents in self.project_files.items():
-            (self._path / rel_path).parent.mkdir(parents=True, exist_ok=True)
-            (self._path / rel_path).write_text(contents)
-        self._runner.env = {**self.environ, **self._runner.env}
+            full_path = os.path.join(base, rel_path)
+            # The version executable rewrites project files so they are always restored
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8", newline="") as handle:
+                handle.write(contents)
+        return self.rerun(*args)
+
+    def rerun(self, *args: str) -> Result:
+        """Run the version executable again without restoring the project files."""
+        if self._runner_environ != self.environ:
+            self._runner.env = {**self.environ, **self._runner.env}
+            self._runner_environ = dict(self.environ)
         invoke_args = list(args)
-        with set_directory(self._path):
+        with _SetDirectory(self._path):
             return self._runner.invoke(main, invoke_args)  # type: ignore
 
+    def edit_file(self, filename: str, contents: str):
+        """Overwrite a file in place, making sure its modification time changes."""
+        path = self._path / filename
+        stat = path.stat()
+        with path.open("w", encoding="utf-8", newline="") as handle:
+            handle.write(contents)
+        # File timestamps can be coarser than the time between two writes
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def symlink(self, link: str, target: str):
+        """Create a symlink in the environment pointing to target."""
+        if not self._path.exists():
+            self._path.mkdir(parents=True)
+        os.symlink(target, self._path / link)
+
+    def list_files(self) -> list[str]:
+        """List the files in the environment."""
+        return sorted(os.fspath(path.relative_to(self._path)) for path in self._path.rglob("*"))
+
+    def reset(self):
+        """Remove all files and settings so the environment can be reused."""
+        self.project_files.clear()
+        self.environ.clear()
+        self._runner.env = {}
+        self._runner_environ = None
+        if not self._path.exists():
+            return
+        for path in self._path.iterdir():
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+
+    def read_bytes(self, filename: str | Path) -> bytes:
+        """Read a file from the environment without translating line endings."""
+        return (self._path / filename).read_bytes()
+
+    def is_symlink(self, filename: str | Path) -> bool:
+        """Return True if the file in the environment is a symlink."""
+        return (self._path / filename).is_symlink()
+
     def read_file(self, filename: str | Path) -> str:
         """Read a file from the environment."""
         with (self._path / filename).open() as handle:
@@ -68,6 +127,18 @@ def step_file_contents(context: VersionExeContext, filename: str):
     context.environment.project_files[filename] = context.text
 
 
+@given('the "{filename}" file with CRLF line endings')
+def step_file_contents_crlf(context: VersionExeContext, filename: str):
+    """Populate a file using CRLF line endings."""
+    context.environment.project_files[filename] = context.text.replace("\n", "\r\n") + "\r\n"
+
+
+@given('the symlink "{link}" to "{target}"')
+def step_symlink(context: VersionExeContext, link: str, target: str):
+    """Create a symlink."""
+    context.environment.symlink(link, target)
+
+
 @given("the env vars")
 def step_set_env(context: VersionExeContext):
     """Set the environment using a Table."""
@@ -81,6 +152,28 @@ def step_run_version(context: VersionExeContext, args: str):
     context.result = context.environment.run(*args.split())
 
 
+@when("I run version multiple times")
+def step_run_version_multiple(context: VersionExeContext):
+    """Run version once for each row of arguments, checking each run's stdout."""
+    for row in context.table:
+        context.result = context.environment.run(*row["args"].split())
+        if context.result.exception:
+            raise AssertionError(row["args"]) from context.result.exception
+        assert row["stdout"] in context.result.stdout, context.result.stdout
+
+
+@when('the "{filename}" file is edited to')
+def step_edit_file(context: VersionExeContext, filename: str):
+    """Overwrite a file left by the previous run."""
+    context.environment.edit_file(filename, context.text)
+
+
+@when("I run version again with no arguments")
+def step_rerun_version_no_args(context: VersionExeContext):
+    """Run version without arguments, keeping the files left by the previous run."""
+    context.result = context.environment.rerun()
+
+
 @when("I run version with no arguments")
 def step_run_version_no_args(context: VersionExeContext):
     """Run version without arguments."""
@@ -96,6 +189,23 @@ def step_stdout_contains(context: VersionExeContext, content: str):
     assert content in context.result.stdout, context.result.stdout
 
 
+@then('stdout does not contain "{content}"')
+def step_stdout_not_contains(context: VersionExeContext, content: str):
+    """Check text is missing from the stdout after running version."""
+    assert context.result, "No result"
+    if context.result.exception:
+        raise AssertionError() from context.result.exception
+    assert content not in context.result.stdout, context.result.stdout
+
+
+@then('version fails with "{content}"')
+def step_version_fails(context: VersionExeContext, content: str):
+    """Check that version exited with an error message."""
+    assert context.result, "No result"
+    assert context.result.exit_code != 0, context.result.stdout
+    assert content in context.result.output, context.result.output
+
+
 @then("stdout contains text")
 def step_stdout_contains_text(context: VersionExeContext):
     """Find text in the stdout after running version."""
@@ -110,3 +220,30 @@ def step_filename_contains_text(context: VersionExeContext, filename: str):
     """Find text in the file."""
     file_contents = context.environment.read_file(filename)
     assert context.text in file_contents, file_contents
+
+
+@then('the file "{filename}" only has CRLF line endings')
+def step_filename_crlf(context: VersionExeContext, filename: str):
+    """Check that every line in the file ends with CRLF."""
+    file_contents = context.environment.read_bytes(filename)
+    assert file_contents.count(b"\n") == file_contents.count(b"\r\n"), file_contents
+
+
+@then('the file "{filename}" is unchanged')
+def step_filename_unchanged(context: VersionExeContext, filename: str):
+    """Check that the file still has the contents it was given."""
+    file_contents = context.environment.read_file(filename)
+    assert file_contents == context.environment.project_files[filename], file_contents
+
+
+@then('the file "{filename}" is a symlink')
+def step_filename_symlink(context: VersionExeContext, filename: str):
+    """Check that the file is still a symlink."""
+    assert context.environment.is_symlink(filename), filename
+
+
+@then("no temporary files are left")
+def step_no_tmp_files(context: VersionExeContext):
+    """Check that no temporary files were left behind."""
+    files = context.environment.list_files()
+    assert not [name for name in files if name.endswith(".tmp")], files
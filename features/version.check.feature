@@ -28,7 +28,7 @@ Feature: Check the version
             | ENV   | <env_value> |
             | EXTRA | more        |
         When I run version with "--check"
-        Then stdout contains "poetry version <final_version>"
+        Then stdout contains "The new version is <final_version>"
         And stdout contains text
             """
             __version__ = "<final_version>"  # Auto-generated
@@ -49,3 +49,40 @@ Feature: Check the version
             | 1.2.3.post1     | v1.2.3.post1 | ^v(.*(\.post[0-9]+)?)$ |                  | true     | 1.2.3.post1       |
             | 1.1.3           | v1.2.3       | ^v(.*)$                | a123+abc         | false    | 1.1.3a123+abc     |
             | 1.1.3           | v1.2.3       | ^v(.*)$                | .dev123+${EXTRA} | false    | 1.1.3.dev123+more |
+
+    Scenario: Check version using poetry
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+            description = ""
+            authors = []
+
+            [[tool.version.handlers]]
+            repo = "repo"
+            matchers = [{ env = "ENV", pattern = '^v(.*)$', validate = false }]
+            extra = "a123+abc"
+            """
+        And the env vars
+            | name | value  |
+            | ENV  | v1.2.3 |
+        When I run version with "--check --use-poetry"
+        Then stdout contains "poetry version 1.1.3a123+abc"
+        And stdout does not contain "pyproject.toml"
+
+    Scenario: Unknown options are rejected
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [tool.version]
+            pep440-check = false
+
+            [[tool.version.handlers]]
+            extras = "a1"
+            """
+        When I run version with "--check"
+        Then version fails with "Unknown VersionConfig option(s): pep440-check"
@@ -0,0 +1,193 @@
+Feature: Rewrite the pyproject version
+
+    Scenario: Nested arrays before the version
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            classifiers = [
+                ["a"],
+            ]
+            version = "1.1.3"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then the file "pyproject.toml" contains text
+            """
+            version = "1.1.3a1"
+            """
+
+    Scenario: Multi-line strings before the version
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            description = '''
+            [not a table]
+            version = "0.0.0"
+            '''
+            version = "1.1.3"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then the file "pyproject.toml" contains text
+            """
+            [not a table]
+            version = "0.0.0"
+            '''
+            version = "1.1.3a1"
+            """
+
+    Scenario: Dotted version key
+        Given the "pyproject.toml" file
+            """
+            [tool]
+            poetry.name = "test-project"
+            poetry.version = "1.1.3"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then the file "pyproject.toml" contains text
+            """
+            poetry.version = "1.1.3a1"
+            """
+
+    Scenario: Quoted table header and dependency versions
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry.dependencies.click]
+            version = "^8.0.4"
+
+            ["tool".poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then the file "pyproject.toml" contains text
+            """
+            [tool.poetry.dependencies.click]
+            version = "^8.0.4"
+
+            ["tool".poetry]
+            name = "test-project"
+            version = "1.1.3a1"
+            """
+
+    Scenario: Missing version
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then version fails with "tool.poetry.version"
+
+    Scenario: Invalid rewrite candidates are skipped
+        Given the "pyproject.toml" file
+            """
+            [tool.other]
+            version = '''0.0.0'''
+
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then the file "pyproject.toml" contains text
+            """
+            version = '''0.0.0'''
+
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3a1"
+            """
+
+    Scenario: CRLF line endings are kept
+        Given the "pyproject.toml" file with CRLF line endings
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [tool.version]
+            version_path = "version.py"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        And the "version.py" file with CRLF line endings
+            """
+            __version__ = "1.1.3"
+            """
+        When I run version with no arguments
+        Then the file "pyproject.toml" only has CRLF line endings
+        And the file "version.py" only has CRLF line endings
+        And the file "pyproject.toml" contains text
+            """
+            version = "1.1.3a1"
+            """
+
+    Scenario: Version is already up to date
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3a1"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with no arguments
+        Then stdout contains "pyproject.toml is already up to date"
+        And stdout does not contain "Rewriting pyproject.toml"
+
+    Scenario: Inline poetry table falls back to poetry
+        Given the "pyproject.toml" file
+            """
+            [tool]
+            poetry = { name = "test-project", version = "1.1.3" }
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        When I run version with "--check"
+        Then stdout contains "pyproject.toml, using poetry instead"
+        And stdout contains "poetry version 1.1.3a1"
+
+    Scenario: Edits between runs are picked up
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [[tool.version.handlers]]
+            """
+        When I run version with no arguments
+        Then stdout contains "The new version is 1.1.3"
+        When the "pyproject.toml" file is edited to
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.4"
+
+            [[tool.version.handlers]]
+            """
+        And I run version again with no arguments
+        Then stdout contains "The new version is 1.1.4"
+        And stdout contains "pyproject.toml is already up to date"
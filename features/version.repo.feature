@@ -25,3 +25,27 @@ Feature: The publish repo
             | project_version   | extra            |
             | 1.1.3             | .dev123+${EXTRA} |
             | 1.1.3.dev123+more | .dev123+${EXTRA} |
+
+    Scenario: Check the version before getting the publish repo
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+            description = ""
+            authors = []
+
+            [[tool.version.handlers]]
+            repo = "my_repo"
+            matchers = [{ env = "ENV", pattern = '^v(.*)$', validate = false }]
+            extra = ".dev123+${EXTRA}"
+            """
+        And the env vars
+            | name  | value  |
+            | ENV   | v1.1.3 |
+            | EXTRA | more   |
+        When I run version multiple times
+            | args    | stdout                               |
+            | --check | The new version is 1.1.3.dev123+more |
+            | --repo  | my_repo                              |
+        Then stdout does not contain "The new version is"
@@ -28,7 +28,7 @@ Feature: Set the version
             | ENV   | <env_value> |
             | EXTRA | more        |
         When I run version with no arguments
-        Then stdout contains "poetry version <final_version>"
+        Then stdout contains "The new version is <final_version>"
         And stdout contains text
             """
             __version__ = "<final_version>"  # Auto-generated
@@ -49,3 +49,133 @@ Feature: Set the version
             | 1.2.3.post1     | v1.2.3.post1 | ^v((\d+)\.(\d+)\.(\d+)(\.post[0-9]+)?)$ |                  | true     | 1.2.3.post1       |
             | 1.1.3           | v1.2.3       | ^v(.*)$                                 | a123+abc         | false    | 1.1.3a123+abc     |
             | 1.1.3           | v1.2.3       | ^v(.*)$                                 | .dev123+${EXTRA} | false    | 1.1.3.dev123+more |
+
+    Scenario: Every run starts from the declared project files
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+            description = ""
+            authors = []
+
+            [tool.version]
+            version_path = "version.py"
+
+            [[tool.version.handlers]]
+            matchers = [{ env = "ENV", pattern = '^v(.*)$' }]
+            """
+        And the "version.py" file
+            """
+            __version__ = "0.0.0"
+            """
+        And the env vars
+            | name | value  |
+            | ENV  | v1.1.3 |
+        When I run version multiple times
+            | args       | stdout               |
+            | --no-repo  | Rewriting version.py |
+            | --no-repo  | Rewriting version.py |
+        Then the file "version.py" contains text
+            """
+            __version__ = "1.1.3"  # Auto-generated
+            """
+
+    Scenario: The version file is already up to date
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [tool.version]
+            version_path = "version.py"
+
+            [[tool.version.handlers]]
+            """
+        And the "version.py" file
+            """
+            # Version file
+            __version__ = "1.1.3"  # Auto-generated
+            """
+        When I run version with no arguments
+        Then stdout contains "version.py is already up to date"
+        And stdout does not contain "Rewriting version.py"
+        And the file "version.py" is unchanged
+        And no temporary files are left
+
+    Scenario: A second run leaves the version file up to date
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [tool.version]
+            version_path = "version.py"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        And the "version.py" file
+            """
+            __version__ = "0.0.0"
+            """
+        When I run version with no arguments
+        Then stdout contains "Rewriting version.py"
+        When I run version again with no arguments
+        Then stdout contains "The new version is 1.1.3a1"
+        And stdout contains "version.py is already up to date"
+        And stdout does not contain "Rewriting version.py"
+        And the file "version.py" contains text
+            """
+            __version__ = "1.1.3a1"  # Auto-generated
+            """
+
+    Scenario: The version file is rewritten through a symlink
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [tool.version]
+            version_path = "version.py"
+
+            [[tool.version.handlers]]
+            extra = "a1"
+            """
+        And the "src/version.py" file
+            """
+            __version__ = "0.0.0"
+            """
+        And the symlink "version.py" to "src/version.py"
+        When I run version with no arguments
+        Then stdout contains "Rewriting version.py"
+        And the file "version.py" is a symlink
+        And the file "src/version.py" contains text
+            """
+            __version__ = "1.1.3a1"  # Auto-generated
+            """
+        And no temporary files are left
+
+    Scenario: The version file has no version line
+        Given the "pyproject.toml" file
+            """
+            [tool.poetry]
+            name = "test-project"
+            version = "1.1.3"
+
+            [tool.version]
+            version_path = "version.py"
+
+            [[tool.version.handlers]]
+            """
+        And the "version.py" file
+            """
+            # Version file
+            """
+        When I run version with no arguments
+        Then stdout contains "no `__version__ = "..."` line found in version.py"
+        And stdout does not contain "Rewriting version.py"
+        And the file "version.py" is unchanged
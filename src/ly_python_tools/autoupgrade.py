@@ -20,12 +20,13 @@ from __future__ import annotations
 import pathlib
 import subprocess  # nosec: B404
 from collections import defaultdict
+from typing import Any
 from typing import Iterable
 from typing import Mapping
 from typing import NewType
 from typing import Sequence
 
-import toml
+from .config import load_pyproject
 
 __all__ = ["main"]
 
@@ -72,15 +73,15 @@ def main():
     """Run the executable."""
     # Read configuration from pyproject.toml
     path = pathlib.Path.cwd() / "pyproject.toml"
-    tool_root = toml.load(path)["tool"]
-    constraints = tool_root.get("autoupgrade", {}).get("constraints", {})
-    extras = tool_root.get("autoupgrade", {}).get("extras", {})
+    tool_root = load_pyproject(path)["tool"]
+    autoupgrade: Mapping[str, Any] = tool_root.get("autoupgrade") or {}
+    poetry: Mapping[str, Any] = tool_root.get("poetry") or {}
+    constraints = autoupgrade.get("constraints", {})
+    extras = autoupgrade.get("extras", {})
     optionals = frozenset(
-        extra
-        for extra_group in tool_root.get("poetry", {}).get("extras", {}).values()
-        for extra in extra_group
+        extra for extra_group in poetry.get("extras", {}).values() for extra in extra_group
     )
-    dev_dependencies = tool_root.get("poetry", {}).get("dev-dependencies", {})
+    dev_dependencies = poetry.get("dev-dependencies", {})
 
     upgrade_packages(
         packages=dev_dependencies.keys(),
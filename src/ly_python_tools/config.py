@@ -1,19 +1,77 @@
 """Helper functions for dealing with the pyproject file."""
 from __future__ import annotations
 
+import os
+import sys
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
+from typing import Any
+from typing import Mapping
 from typing import Sequence
 
+__all__ = [
+    "NoProjectFile",
+    "clear_pyproject_cache",
+    "get_pyproject",
+    "load_pyproject",
+    "parse_pyproject",
+]
+
 
 def get_pyproject(config_name: Path | str = "pyproject.toml") -> Path:
-    """Get the location of pyproject.toml in the first parent diretory."""
-    cwd = Path.cwd().absolute()
-    paths = [cwd] + list(cwd.parents)
-    for path in paths:
+    """
+    Get the location of pyproject.toml in the first parent diretory.
+
+    Lookups are cached per working directory. The CLIs are single-threaded and this is not
+    expected to be called concurrently. Use `clear_pyproject_cache` if the file may have moved.
+    """
+    return _find_pyproject(os.getcwd(), str(config_name))
+
+
+def load_pyproject(pyproject: Path) -> Mapping[str, Any]:
+    """
+    Load the contents of a pyproject file.
+
+    The parsed contents are cached until the file changes on disk, so the result must not be
+    mutated.
+    """
+    stat = pyproject.stat()
+    return _load_pyproject(str(pyproject), stat.st_mtime_ns, stat.st_size)
+
+
+def parse_pyproject(contents: str) -> dict[str, Any]:
+    """Parse the contents of a pyproject file without caching."""
+    # Imported on first use to keep the CLI startup fast
+    # pylint: disable=import-outside-toplevel
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
+    return tomllib.loads(contents)
+
+
+def clear_pyproject_cache():
+    """Forget all cached pyproject lookups and contents."""
+    _find_pyproject.cache_clear()
+    _load_pyproject.cache_clear()
+
+
+@lru_cache(maxsize=32)
+def _find_pyproject(cwd_name: str, config_name: str) -> Path:
+    cwd = Path(cwd_name)
+    for path in chain((cwd,), cwd.parents):
         pyproject = path / config_name
-        if pyproject.exists() and pyproject.is_file():
+        if pyproject.is_file():
             return pyproject
-    raise NoProjectFile(config_name, search_paths=paths)
+    raise NoProjectFile(config_name, search_paths=list(chain((cwd,), cwd.parents)))
+
+
+@lru_cache(maxsize=8)
+def _load_pyproject(path: str, _mtime_ns: int, _size: int) -> Mapping[str, Any]:
+    # Decode the raw bytes like tomllib.load so newlines in strings are preserved
+    return parse_pyproject(Path(path).read_bytes().decode())
 
 
 class NoProjectFile(Exception):
@@ -3,27 +3,50 @@ from __future__ import annotations
 
 import os
 import re
-import shutil
+import sys
+from contextlib import suppress
 from dataclasses import dataclass
 from dataclasses import field
+from functools import lru_cache
 from pathlib import Path
 from subprocess import CalledProcessError  # nosec: B404
 from subprocess import run  # nosec: B404
-from tempfile import TemporaryDirectory
+from types import MappingProxyType
 from typing import Any
 from typing import ClassVar
 from typing import Mapping
-from typing import Match
-from typing import Pattern
 from typing import Sequence
+from typing import TYPE_CHECKING
 
 import click
-import toml
-from expandvars import expandvars
-from poetry.core.version.exceptions import InvalidVersion
-from poetry.core.version.version import Version
 
 from .config import get_pyproject
+from .config import load_pyproject
+from .config import parse_pyproject
+
+if TYPE_CHECKING:
+    from poetry.core.version.version import Version
+
+# Slotted dataclasses are only supported in python 3.10+
+_SLOTS: dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+_PEP440_RE = re.compile(
+    r"^([1-9][0-9]*!)?(0|[1-9][0-9]*)(\.(0|[1-9][0-9]*))*((a|b|rc)(0|[1-9][0-9]*))?"
+    r"(\.post(0|[1-9][0-9]*))?(\.dev(0|[1-9][0-9]*))?$"
+)
+# The rest of the line is matched up to (but not including) any "\r" so CRLF files keep it
+_VERSION_LINE_RE = re.compile(r"^__version__ = \"[^\"]*\"[^\r\n]*", re.MULTILINE)
+# Lines that may set `tool.poetry.version`, including dotted keys (`poetry.version = ...`)
+_POETRY_VERSION_RE = re.compile(
+    r"""^(\s*(?:(?:tool|"tool"|'tool')\s*\.\s*)?(?:(?:poetry|"poetry"|'poetry')\s*\.\s*)?"""
+    r"""(?:version|"version"|'version')\s*=\s*)(["'])[^"'\n]*\2(.*)$""",
+    re.MULTILINE,
+)
+
+
+def _snapshot_environ() -> Mapping[str, str]:
+    """Return a read-only copy of the environment so a run sees consistent values."""
+    return MappingProxyType(dict(os.environ))
 
 
 @click.command("version")
@@ -38,7 +61,13 @@ from .config import get_pyproject
     default=False,
     help="Check what changes would be made",
 )
-def main(repo: bool, check: bool):
+@click.option(
+    "--use-poetry",
+    is_flag=True,
+    default=False,
+    help="Set the project version with `poetry version` instead of editing pyproject.toml.",
+)
+def main(repo: bool, check: bool, use_poetry: bool):
     # noqa: D301
     """
     Application for managing python versions via pyproject.toml file.
@@ -50,25 +79,36 @@ def main(repo: bool, check: bool):
     * Checking that tags match the version listed in the poetry file.
     * Writing the version to the file containing `__version__ = "..."`
     """
+    # Imported here so that `--help` doesn't wait on poetry-core. Every run, including --repo,
+    # still parses and validates the project version so poetry-core is imported anyway.
+    # pylint: disable-next=import-outside-toplevel
+    from poetry.core.version.exceptions import InvalidVersion
+
     if repo and check:
         raise click.UsageError("--check and --repo are mutually exclusive.")
     try:
-        app = VersionApp.from_pyproject(pyproject=get_pyproject(), apply=not check)
+        app = VersionApp.from_pyproject(
+            pyproject=get_pyproject(),
+            apply=not check,
+            use_poetry=use_poetry,
+        )
     except (InvalidVersion, ValueError) as exc:
         raise click.ClickException(click.style(str(exc), fg="red")) from exc
 
     if repo and app.repo:
-        click.echo(expandvars(app.repo, nounset=True))
+        click.echo(_expandvars(app.repo, app.environ))
         return
 
     try:
         app.apply_version()
     except CalledProcessError as exc:
         raise click.ClickException(click.style(exc.output, fg="red")) from exc
+    except ValueError as exc:
+        raise click.ClickException(click.style(str(exc), fg="red")) from exc
 
 
-@dataclass(frozen=True)
-class VersionApp:
+@dataclass(frozen=True, **_SLOTS)
+class VersionApp:  # pylint: disable=too-many-instance-attributes
     """
     Version application.
 
@@ -80,12 +120,27 @@ class VersionApp:
         The original `tool.poetry.version` field.
     apply:
         If True, changes will be applied.
+    pyproject:
+        The pyproject.toml file the project version is written to.
+    use_poetry:
+        If True, the project version is set with `poetry version`.
+    environ:
+        The environment variables used to expand the version extras. This should be the same
+        snapshot the config's matchers were loaded with. Defaults to a new snapshot of the
+        current environment.
 
     """
 
     config: VersionConfig
     project_version: Version
     apply: bool
+    pyproject: Path
+    use_poetry: bool = False
+    _handler: VersionHandler = field(init=False, repr=False, compare=False)
+    _full_version: Version = field(init=False, repr=False, compare=False)
+    environ: Mapping[str, str] = field(
+        default_factory=_snapshot_environ, repr=False, compare=False
+    )
 
     # _apply_colors[0] is used when apply = False, otherwise _apply_colors[1] is used.
     _apply_colors: ClassVar[Sequence[str]] = ["yellow", "green"]
@@ -95,6 +150,10 @@ class VersionApp:
     _warn_color: ClassVar[str] = "magenta"
 
     def __post_init__(self):
+        # The environment doesn't change during a run so compute these once.
+        object.__setattr__(self, "_handler", self.config.get_handler())
+        object.__setattr__(self, "_full_version", self._get_full_version())
+
         self.handler.check_version(self.full_version)
 
         if self.config.pep440_check and not self.is_canonical:
@@ -107,16 +166,12 @@ class VersionApp:
     @property
     def handler(self) -> VersionHandler:
         """Return the handler."""
-        return self.config.get_handler()
+        return self._handler
 
     @property
     def full_version(self) -> Version:
         """Return the version including all of the extra environment tags."""
-        extras = expandvars(self.handler.extra, nounset=True)
-        if str(self.project_version).endswith(extras):
-            # Project file already contains the extras so don't include it again
-            return self.project_version
-        return Version(str(self.project_version) + extras)
+        return self._full_version
 
     @property
     def is_canonical(self) -> bool:
@@ -126,14 +181,7 @@ class VersionApp:
         See
         https://peps.python.org/pep-0440/#appendix-b-parsing-version-strings-with-regular-expressions
         """
-        return (
-            re.match(
-                r"^([1-9][0-9]*!)?(0|[1-9][0-9]*)(\.(0|[1-9][0-9]*))*((a|b|rc)(0|[1-9][0-9]*))?"
-                + r"(\.post(0|[1-9][0-9]*))?(\.dev(0|[1-9][0-9]*))?$",
-                self.full_version.public,
-            )
-            is not None
-        )
+        return _PEP440_RE.match(self.full_version.public) is not None
 
     @property
     def repo(self) -> str | None:
@@ -144,14 +192,35 @@ class VersionApp:
     def _apply_color(self) -> str:
         return "green" if self.apply else "yellow"
 
+    def _get_full_version(self) -> Version:
+        extras = _expandvars(self.handler.extra, self.environ)
+        if str(self.project_version).endswith(extras):
+            # Project file already contains the extras so don't include it again
+            return self.project_version
+        return _parse_version(str(self.project_version) + extras)
+
     @classmethod
-    def from_pyproject(cls, pyproject: Path, apply: bool) -> VersionApp:
+    def from_pyproject(
+        cls,
+        pyproject: Path,
+        apply: bool,
+        use_poetry: bool = False,
+        environ: Mapping[str, str] | None = None,
+    ) -> VersionApp:
         """Load the application from a pyproject.toml file."""
-        tool_root = toml.load(pyproject)["tool"]
+        if environ is None:
+            environ = _snapshot_environ()
+        tool_root = load_pyproject(pyproject)["tool"]
+        poetry: Mapping[str, Any] = tool_root.get("poetry") or {}
+        if "version" not in poetry:
+            raise ValueError("Could not find tool.poetry.version in pyproject.toml")
         return cls(
-            config=VersionConfig.from_dict(dict(tool_root.get("version", {}))),
-            project_version=Version(tool_root.get("poetry", {}).get("version")),
+            config=VersionConfig.from_dict(tool_root.get("version") or {}, environ),
+            project_version=_parse_version(poetry["version"]),
             apply=apply,
+            pyproject=pyproject,
+            use_poetry=use_poetry,
+            environ=environ,
         )
 
     def apply_version(self) -> VersionApp:
@@ -161,41 +230,174 @@ class VersionApp:
         return self
 
     def _apply_version(self):
+        click.secho(f"The new version is {self.full_version!s}", fg=self._apply_color)
+        if self.use_poetry:
+            self._apply_poetry_version()
+        else:
+            self._write_pyproject_version()
+
+    def _apply_poetry_version(self):
         # Use poetry to set the version
         cmd = ["poetry", "version", str(self.full_version)]
 
-        click.secho(f"The new version is {self.full_version!s}", fg=self._apply_color)
         click.secho(f"{' '.join(cmd)}", fg=self._content_color)
         if not self.apply:
             return
 
         run(cmd, check=True, capture_output=True)  # nosec
 
+    def _write_pyproject_version(self):
+        # Rewrite `tool.poetry.version` in place rather than starting up poetry
+        contents = _read_file(self.pyproject)
+        new_contents = _set_poetry_version(
+            contents, load_pyproject(self.pyproject), str(self.full_version)
+        )
+        if new_contents is None:
+            click.secho(
+                f"Could not rewrite the version in {self.pyproject!s}, using poetry instead",
+                fg=self._warn_color,
+            )
+            self._apply_poetry_version()
+            return
+
+        preview = f'version = "{self.full_version!s}"'
+        if new_contents == contents:
+            click.secho(f"{self.pyproject!s} is already up to date", fg=self._apply_color)
+            click.secho(preview, fg=self._content_color)
+            return
+
+        click.secho(f"Rewriting {self.pyproject!s}", fg=self._apply_color)
+        click.secho(preview, fg=self._content_color)
+        if self.apply:
+            _replace_file(self.pyproject, new_contents)
+
     def _write_version_file(self):
         # Rewrite the version file
-        matcher = re.compile(r"^__version__ = \"[^\"]*\".*$")
         version_string = f'__version__ = "{self.full_version!s}"  # Auto-generated'
 
         if not self.config.version_path:
             return
 
-        with TemporaryDirectory() as outdir:
-            new_contents: list[str] = []
-            with self.config.version_path.open(encoding="utf-8") as read:
-                new_contents = [matcher.sub(version_string, line) for line in read.readlines()]
+        version_path = self.config.version_path
+        contents = _read_file(version_path)
+        new_contents, count = _VERSION_LINE_RE.subn(version_string, contents)
+        # Only the rewritten lines are shown rather than the whole file
+        preview = f"{version_string}\n" * count
+
+        if not count:
+            click.secho(
+                f'Warning: no `__version__ = "..."` line found in {version_path!s}',
+                fg=self._warn_color,
+            )
+            return
+
+        if new_contents == contents:
+            click.secho(f"{version_path!s} is already up to date", fg=self._apply_color)
+            click.secho(preview, nl=False, fg=self._content_color)
+            return
+
+        click.secho(f"Rewriting {version_path!s}", fg=self._apply_color)
+        click.secho(preview, nl=False, fg=self._content_color)
+        if self.apply:
+            _replace_file(version_path, new_contents)
+
+
+def _read_file(path: Path) -> str:
+    """Read the file contents without translating line endings."""
+    with path.open(encoding="utf-8", newline="") as handle:
+        return handle.read()
+
+
+def _replace_file(path: Path, contents: str):
+    """Replace the file contents atomically, writing through symlinks."""
+    target = path.resolve()
+    # Write next to the target so the rename stays on the same filesystem
+    tmp_path = target.with_suffix(target.suffix + ".tmp")
+    try:
+        # Line endings are written as is so CRLF files stay CRLF
+        with tmp_path.open("w", encoding="utf-8", newline="") as handle:
+            handle.write(contents)
+        os.replace(tmp_path, target)
+    finally:
+        # Only left behind if writing or renaming failed
+        with suppress(FileNotFoundError):
+            tmp_path.unlink()
+
+
+# The heavier dependencies are imported on first use to keep the CLI startup fast.
+def _expandvars(value: str, environ: Mapping[str, str]) -> str:
+    """Expand the environment variables in value, failing on unset variables."""
+    # pylint: disable-next=import-outside-toplevel
+    from expandvars import expand
+
+    return expand(value, nounset=True, environ=environ)
+
+
+def _new_version(version: str) -> Version:
+    """Parse a version string."""
+    # pylint: disable-next=import-outside-toplevel
+    from poetry.core.version.version import Version
+
+    return Version(version)
 
-            outfile = Path(outdir) / "out.py"
-            with outfile.open("w") as out:
-                out.writelines(new_contents)
 
-            click.secho(f"Rewriting {self.config.version_path!s}", fg=self._apply_color)
-            click.secho("".join(new_contents), nl=False, fg=self._content_color)
+# Versions are never mutated so the parsed project and full versions can be shared.
+_parse_version = lru_cache(maxsize=128)(_new_version)
 
-            if self.apply:
-                shutil.copy(outfile, self.config.version_path)
 
+# Configuration keys accepted by each from_dict
+_CONFIG_KEYS = frozenset(("pep440_check", "handlers", "version_path"))
+_HANDLER_KEYS = frozenset(("matchers", "repo", "extra"))
+_MATCHER_KEYS = frozenset(("env", "pattern", "validate"))
 
-@dataclass(frozen=True)
+
+def _check_keys(cls: Any, data: Mapping[str, Any], known: frozenset[str]):
+    """Raise ValueError if data has keys that aren't configuration options of cls."""
+    unknown = data.keys() - known
+    if unknown:
+        raise ValueError(
+            f"Unknown {cls.__name__} option(s): {', '.join(sorted(unknown))}. "
+            f"Expected one of: {', '.join(sorted(known))}"
+        )
+
+
+def _set_poetry_version(contents: str, parsed: Mapping[str, Any], version: str) -> str | None:
+    """
+    Return the pyproject contents with `tool.poetry.version` set to version.
+
+    Each line that looks like a version assignment is tried in turn. A rewrite is only accepted
+    if parsing the result shows that `tool.poetry.version` is the only value that changed
+    compared to parsed (the already parsed contents), so look-alike lines (e.g. in dependency
+    tables or multi-line strings) are left alone. None is returned if no line could be
+    rewritten (e.g. the version is set in an inline table).
+    """
+    try:
+        tool = parsed["tool"]
+        poetry = tool["poetry"]
+        if poetry["version"] == version:
+            return contents
+        # Copy only the tables on the path to the version since parsed must not be mutated
+        expected = {**parsed, "tool": {**tool, "poetry": {**poetry, "version": version}}}
+    except (KeyError, TypeError) as exc:
+        raise ValueError("Could not find tool.poetry.version in pyproject.toml") from exc
+
+    for match in _POETRY_VERSION_RE.finditer(contents):
+        new_contents = (
+            f'{contents[: match.start()]}{match.group(1)}"{version}"{match.group(3)}'
+            f"{contents[match.end():]}"
+        )
+        try:
+            # TOMLDecodeError is a ValueError
+            new_parsed = parse_pyproject(new_contents)
+        except ValueError:
+            # e.g. the candidate was part of a multi-line string
+            continue
+        if new_parsed == expected:
+            return new_contents
+    return None
+
+
+@dataclass(frozen=True, **_SLOTS)
 class VersionConfig:
     """
     Configuration for version tools.
@@ -223,19 +425,25 @@ class VersionConfig:
         raise ValueError("No matching handlers found for this build")
 
     @classmethod
-    def from_dict(cls, data: Mapping[str, Any]) -> VersionConfig:
-        """Load an object from a dict."""
-        data_copy = dict(data)
-        handlers = [VersionHandler.from_dict(handler) for handler in data_copy.pop("handlers", [])]
-        version_path = data_copy.pop("version_path", None)
+    def from_dict(
+        cls, data: Mapping[str, Any], environ: Mapping[str, str] | None = None
+    ) -> VersionConfig:
+        """Load an object from a dict, matching against environ (default: a new snapshot)."""
+        _check_keys(cls, data, _CONFIG_KEYS)
+        if environ is None:
+            # Every matcher sees the same snapshot
+            environ = _snapshot_environ()
+        version_path = data.get("version_path")
         return cls(
-            **data_copy,
-            handlers=handlers,
+            pep440_check=data.get("pep440_check", True),
+            handlers=[
+                VersionHandler.from_dict(handler, environ) for handler in data.get("handlers", [])
+            ],
             version_path=Path(version_path) if version_path else None,
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class VersionHandler:
     """
     Rule for configuration and environment based version handler.
@@ -262,8 +470,11 @@ class VersionHandler:
     extra: str = ""
 
     def __post_init__(self):
-        if len([1 for matcher in self.matchers if matcher.validate]) > 1:
-            raise ValueError("It doesn't make sense to validate more than one matcher")
+        validators = 0
+        for matcher in self.matchers:
+            validators += matcher.validate
+            if validators > 1:
+                raise ValueError("It doesn't make sense to validate more than one matcher")
 
     def match_env(self) -> bool:
         """Return True if this handler should be triggered."""
@@ -275,14 +486,22 @@ class VersionHandler:
             matcher.check_version(full_version)
 
     @classmethod
-    def from_dict(cls, data: Mapping[str, Any]) -> VersionHandler:
-        """Load an object from a dict."""
-        data_copy = dict(data)
-        matchers = data_copy.pop("matchers", [])
-        return cls(**data_copy, matchers=[Matcher.from_dict(matcher) for matcher in matchers])
+    def from_dict(
+        cls, data: Mapping[str, Any], environ: Mapping[str, str] | None = None
+    ) -> VersionHandler:
+        """Load an object from a dict, matching against environ (default: a new snapshot)."""
+        _check_keys(cls, data, _HANDLER_KEYS)
+        if environ is None:
+            # Every matcher sees the same snapshot
+            environ = _snapshot_environ()
+        return cls(
+            matchers=[Matcher.from_dict(matcher, environ) for matcher in data.get("matchers", [])],
+            repo=data.get("repo"),
+            extra=data.get("extra", ""),
+        )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class Matcher:
     """
     Determine if the environment variable matches a pattern.
@@ -295,19 +514,30 @@ class Matcher:
         The regex pattern to match on env.
     validate:
         If True, the first group in the pattern must match the version checked-in for this project.
+    environ:
+        The environment variables to look up env in. Defaults to a new snapshot of the current
+        environment.
 
     """
 
     env: str
-    pattern: Pattern[str]
-    validate: bool
+    pattern: re.Pattern[str]
+    validate: bool = False
+    _match: re.Match[str] | None = field(init=False, repr=False, compare=False)
+    environ: Mapping[str, str] = field(
+        default_factory=_snapshot_environ, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        # The environment doesn't change during a run so only match it once.
+        # pylint cannot infer members of the subscripted `re.Pattern[str]` annotation
+        # pylint: disable-next=no-member
+        object.__setattr__(self, "_match", self.pattern.match(self.environ.get(self.env, "")))
 
     @property
-    def _matched(self) -> Match[str] | None:
+    def _matched(self) -> re.Match[str] | None:
         """Return the matched pattern."""
-        # Lint false-positive: https://github.com/PyCQA/pylint/issues/5091
-        # pylint: disable=invalid-envvar-value
-        return self.pattern.match(os.getenv(self.env, ""))
+        return self._match
 
     def match_env(self) -> bool:
         """Return True if the environment variable matches the pattern."""
@@ -321,7 +551,7 @@ class Matcher:
         if not self._matched:
             raise ValueError("Could not match the regex")
 
-        version = Version(self._matched.groups()[0])
+        version = _new_version(self._matched.group(1))
         if version == full_version:
             return
         raise ValueError(
@@ -329,12 +559,19 @@ class Matcher:
         )
 
     @classmethod
-    def from_dict(cls, data: Mapping[str, Any]) -> Matcher:
-        """Load an object from a dict."""
-        data_copy = dict(data)
-        pattern = re.compile(data_copy.pop("pattern"))
-        validate = bool(data_copy.pop("validate", False))
-        return cls(**data_copy, pattern=pattern, validate=validate)
+    def from_dict(
+        cls, data: Mapping[str, Any], environ: Mapping[str, str] | None = None
+    ) -> Matcher:
+        """Load an object from a dict, matching against environ (default: a new snapshot)."""
+        _check_keys(cls, data, _MATCHER_KEYS)
+        if environ is None:
+            environ = _snapshot_environ()
+        return cls(
+            env=data["env"],
+            pattern=re.compile(data["pattern"]),
+            validate=bool(data.get("validate", False)),
+            environ=environ,
+        )
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 # pylint: disable=all
 # flake8: noqa
+from typing import Mapping
+
 class ExpandvarsException(Exception):
     """The base exception for all the handleable exceptions."""
 
@@ -8,4 +10,7 @@ class ExpandvarsException(Exception):
 class UnboundVariable(ExpandvarsException, KeyError):
     def __init__(self, param: str) -> None: ...
 
+def expand(
+    vars_: str, nounset: bool = ..., environ: Mapping[str, str] = ..., var_symbol: str = ...
+) -> str: ...
 def expandvars(vars_: str, nounset: bool = ...) -> str: ...